@@ -1,8 +1,15 @@
 import os
+from collections import namedtuple
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
 load_dotenv()
+
+# 工具调用结果：name 为工具名，parameters 为模型给出的参数字典
+ToolCall = namedtuple("ToolCall", ["name", "parameters"])
+# 模型响应：content 为文本内容，tool_call 为 ToolCall 或 None
+LLMResponse = namedtuple("LLMResponse", ["content", "tool_call"])
+
 class DoubaoModel(ChatOpenAI):
     def __init__(self):
         super().__init__(# 环境变量中配置您的API Key
@@ -10,4 +17,24 @@ class DoubaoModel(ChatOpenAI):
             # 替换为您需要调用的模型服务Base Url
             openai_api_base=os.getenv("DOUBAO_URL"),
             # 替换为您创建推理接入点 ID
-            model_name=os.getenv("DOUBAO_MODEL_NAME"))
\ No newline at end of file
+            model_name=os.getenv("DOUBAO_MODEL_NAME"))
+
+    async def acall_with_tools(self, user_question, tools):
+        """让大模型根据问题决定是否调用工具，返回 LLMResponse。"""
+        message = await self.bind_tools(tools).ainvoke(user_question)
+        tool_call = None
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            tool_call = ToolCall(call["name"], call["args"])
+        return LLMResponse(message.content, tool_call)
+
+    async def agenerate_answer_with_context(self, user_question, context):
+        """结合知识图谱检索到的信息生成最终答案。"""
+        prompt = f"请根据以下从知识图谱中检索到的信息回答用户问题。\n{context}\n\n用户问题: {user_question}"
+        message = await self.ainvoke(prompt)
+        return message.content
+
+    async def agenerate_answer(self, user_question):
+        """不借助外部信息，直接由大模型回答问题。"""
+        message = await self.ainvoke(user_question)
+        return message.content
@@ -0,0 +1,107 @@
+import os
+import json
+import asyncio
+from .LLMs import ToolCall, LLMResponse
+
+class CachedLLM:
+    """
+    为大模型增加问题缓存层：规范化后（忽略大小写、空白和句末标点）文本相同的问题，
+    直接复用缓存的工具调用决策或直接回答，不再请求大模型。
+    只做精确匹配，不按语义相似度复用：相似问题的向量可能非常接近，但实体或意图不同
+    （如"谷歌"与"微软"的创始人，或同一公司的创始人与其他信息），复用会带错工具参数或跳过图谱查询，
+    因此相似但不相同的问题不会被缓存短路，仍完整地走一遍大模型调用。
+    其余属性和方法透明地转发给被包装的模型。
+    """
+    def __init__(self, llm, cache_path=None, save_every=20):
+        self.llm = llm
+        self.cache_path = cache_path
+        self.save_every = save_every  # 每新增多少条缓存落盘一次，其余在 close/save 时写入
+        self.entries = {}  # 规范化问题文本 -> 缓存条目
+        self._unsaved = 0  # 上次落盘后新增或修改的条目数
+        self._save_lock = asyncio.Lock()
+        self._load()
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    async def acall_with_tools(self, user_question, tools):
+        """带缓存的工具调用决策。"""
+        entry = self.entries.get(self._normalize(user_question))
+        if entry and "response" in entry:
+            return self._decode_response(entry["response"])
+        response = await self.llm.acall_with_tools(user_question, tools)
+        await self._store(user_question, "response", self._encode_response(response))
+        return response
+
+    async def agenerate_answer_with_context(self, user_question, context):
+        # 答案依赖于实时检索到的图谱信息，不做缓存
+        return await self.llm.agenerate_answer_with_context(user_question, context)
+
+    async def agenerate_answer(self, user_question):
+        """带缓存的直接回答。"""
+        entry = self.entries.get(self._normalize(user_question))
+        if entry and "answer" in entry:
+            return entry["answer"]
+        answer = await self.llm.agenerate_answer(user_question)
+        await self._store(user_question, "answer", answer)
+        return answer
+
+    async def close(self):
+        """把尚未落盘的缓存写入磁盘。"""
+        await self.asave()
+
+    @staticmethod
+    def _normalize(text):
+        """忽略大小写、空白和句末标点，用于判断两个问题是否相同。"""
+        return "".join(text.split()).casefold().rstrip("?？!！。.")
+
+    async def _store(self, user_question, key, value):
+        """把结果写入缓存；同一问题已有条目时直接补充字段。"""
+        self.entries.setdefault(self._normalize(user_question), {})[key] = value
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            await self.asave()
+
+    @staticmethod
+    def _encode_response(response):
+        tool_call = response.tool_call._asdict() if response.tool_call else None
+        return {"content": response.content, "tool_call": tool_call}
+
+    @staticmethod
+    def _decode_response(data):
+        tool_call = ToolCall(**data["tool_call"]) if data["tool_call"] else None
+        return LLMResponse(data["content"], tool_call)
+
+    def _load(self):
+        """从磁盘加载缓存条目。"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        with open(self.cache_path, "r", encoding="utf-8") as f:
+            self.entries = json.load(f)
+
+    def _snapshot(self):
+        """在事件循环线程中序列化当前缓存，写盘期间的新条目不会影响本次写入的内容。"""
+        if not self.cache_path or not self._unsaved:
+            return None
+        self._unsaved = 0
+        return json.dumps(self.entries, ensure_ascii=False)
+
+    def _write(self, snapshot):
+        """先写临时文件再替换，进程中途退出也不会留下写了一半的缓存文件。"""
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.cache_path)
+
+    async def asave(self):
+        """在线程中落盘，不阻塞事件循环。"""
+        async with self._save_lock:
+            snapshot = self._snapshot()
+            if snapshot:
+                await asyncio.to_thread(self._write, snapshot)
+
+    def save(self):
+        """同步落盘，供进程退出时调用。"""
+        snapshot = self._snapshot()
+        if snapshot:
+            self._write(snapshot)
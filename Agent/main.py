@@ -1,74 +1,159 @@
 import os
 import json
-from py2neo import Graph
+import asyncio
+import atexit
+from neo4j import GraphDatabase
 from Models.LLMs import DoubaoModel
+from Models.SemanticCache import CachedLLM
 
-# 初始化 Neo4j 连接
-graph = Graph(os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASS")))
-llm_client = DoubaoModel()
+# 初始化 Neo4j 驱动：进程内共享一个连接池，每次查询从池中借用连接
+driver = GraphDatabase.driver(
+    os.getenv("NEO4J_URI"),
+    auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASS")),
+    max_connection_pool_size=50)
+atexit.register(driver.close)
+# 问题缓存：重复提出的问题直接复用之前的工具调用决策和答案，缓存持久化在 Agent 目录下
+llm_client = CachedLLM(DoubaoModel(), cache_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.json"))
+atexit.register(llm_client.save)
 
-def find_founders_cypher(company_name):
-    """根据公司名生成查找创始人的 Cypher 查询"""
-    return f"""
-    MATCH (c:Company {{name: '{company_name}'}})<-[:FOUNDED_BY]-(p:Person)
+# 大模型可以使用的工具
+TOOLS = [
+    {
+        "name": "get_company_founders",
+        "description": "获取某个公司的创始人信息。用于回答'谁创立了公司X'类型的问题。",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "company_name": {
+                    "type": "string",
+                    "description": "要查询的公司名称。"
+                }
+            },
+            "required": ["company_name"]
+        }
+    }
+]
+
+# 公司名通过参数传入：查询文本固定不变，Neo4j 可以复用缓存的执行计划，也避免了注入
+FIND_FOUNDERS_QUERY = """
+    MATCH (c:Company {name: $name})<-[:FOUNDED_BY]-(p:Person)
     RETURN p.name AS founder_name
     """
 
-def run_query_and_format_result(query):
+# 批量版本：一次查询多个公司的创始人
+FIND_FOUNDERS_BATCH_QUERY = """
+    MATCH (c:Company)<-[:FOUNDED_BY]-(p:Person)
+    WHERE c.name IN $names
+    RETURN c.name AS company_name, collect(p.name) AS founders
+    """
+
+def find_founders_cypher(company_name):
+    """根据公司名生成查找创始人的 Cypher 查询及其参数"""
+    return FIND_FOUNDERS_QUERY, {"name": company_name}
+
+def run_query_and_format_result(query, params=None):
     """执行 Cypher 查询并格式化结果"""
-    result = graph.run(query).data()
+    with driver.session(database=os.getenv("NEO4J_DATABASE", "neo4j")) as session:
+        result = session.run(query, params).data()
     if not result:
         return None
     
     founders = [r['founder_name'] for r in result]
+    return format_founders(founders)
+
+def format_founders(founders):
+    """把创始人列表格式化为提供给大模型的上下文"""
     return f"检索到的信息: 该公司的创始人是 {', '.join(founders)}。"
 
-def answer_question_with_kg(user_question):
-    """主函数：利用知识图谱回答用户问题"""
+def find_founders_batch(company_names):
+    """一次查询多个公司的创始人，返回 公司名 -> 创始人列表"""
+    with driver.session(database=os.getenv("NEO4J_DATABASE", "neo4j")) as session:
+        result = session.run(FIND_FOUNDERS_BATCH_QUERY, names=list(company_names)).data()
+    return {r['company_name']: r['founders'] for r in result}
 
-    # 步骤一：定义大模型可以使用的工具
-    tools = [
-        {
-            "name": "get_company_founders",
-            "description": "获取某个公司的创始人信息。用于回答'谁创立了公司X'类型的问题。",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "company_name": {
-                        "type": "string",
-                        "description": "要查询的公司名称。"
-                    }
-                },
-                "required": ["company_name"]
-            }
-        }
-    ]
+async def answer_question_with_kg(user_question):
+    """主函数：利用知识图谱回答用户问题"""
 
-    # 步骤二：让大模型决定是否调用工具
-    llm_response = llm_client.call_with_tools(user_question, tools)
+    # 步骤一：让大模型决定是否调用工具
+    llm_response = await llm_client.acall_with_tools(user_question, TOOLS)
     
     if llm_response.tool_call:
         tool_call = llm_response.tool_call
         if tool_call.name == "get_company_founders":
             company = tool_call.parameters["company_name"]
             
-            # 步骤三：根据工具调用生成并执行 Cypher
-            cypher_query = find_founders_cypher(company)
-            kg_context = run_query_and_format_result(cypher_query)
+            # 步骤二：根据工具调用生成并执行 Cypher
+            cypher_query, params = find_founders_cypher(company)
+            # 图谱查询是同步阻塞调用，放到线程中执行以免阻塞事件循环
+            kg_context = await asyncio.to_thread(run_query_and_format_result, cypher_query, params)
             
             if kg_context:
-                # 步骤四：结合图谱结果和大模型生成最终答案
-                final_answer = llm_client.generate_answer_with_context(user_question, kg_context)
+                # 步骤三：结合图谱结果和大模型生成最终答案
+                final_answer = await llm_client.agenerate_answer_with_context(user_question, kg_context)
                 return final_answer
             else:
                 return f"抱歉，知识图谱中没有找到关于 {company} 创始人的信息。"
     
     # 如果大模型没有选择调用工具，可以直接让它生成答案
-    return llm_client.generate_answer(user_question)
+    return await llm_client.agenerate_answer(user_question)
+
+async def answer_questions_batch(questions, max_concurrency=8):
+    """
+    批量回答多个问题，返回的答案顺序与输入问题一致。
+    分三个阶段：并发做工具调用决策 -> 所有公司名合并为一次图谱查询 -> 并发生成最终答案。
+    max_concurrency 限制同时在途的大模型请求数，避免触发服务端限流。
+    单个问题出错（如限流、超时）只影响该问题，对应位置返回错误说明，其余答案照常返回。
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    def error_answer(error):
+        return f"抱歉，回答该问题时出错: {error}"
+
+    # 阶段一：并发让大模型为每个问题决定是否调用工具
+    responses = await asyncio.gather(*(limited(llm_client.acall_with_tools(q, TOOLS)) for q in questions),
+                                     return_exceptions=True)
+    companies = [
+        r.tool_call.parameters["company_name"]
+        if not isinstance(r, Exception) and r.tool_call and r.tool_call.name == "get_company_founders" else None
+        for r in responses
+    ]
+
+    # 阶段二：一次图谱查询取回所有涉及公司的创始人
+    names = {c for c in companies if c}
+    kg_error = None
+    try:
+        founders_by_company = await asyncio.to_thread(find_founders_batch, names) if names else {}
+    except Exception as e:
+        founders_by_company, kg_error = {}, e
+
+    # 阶段三：并发生成最终答案
+    async def answer(question, response, company):
+        if isinstance(response, Exception):
+            return error_answer(response)
+        if company is None:
+            return await llm_client.agenerate_answer(question)
+        if kg_error is not None:
+            return error_answer(kg_error)
+        founders = founders_by_company.get(company)
+        if not founders:
+            return f"抱歉，知识图谱中没有找到关于 {company} 创始人的信息。"
+        return await llm_client.agenerate_answer_with_context(question, format_founders(founders))
+
+    answers = await asyncio.gather(*(limited(answer(q, r, c)) for q, r, c in zip(questions, responses, companies)),
+                                   return_exceptions=True)
+    return [error_answer(a) if isinstance(a, Exception) else a for a in answers]
+
+async def answer_many(questions):
+    """并发回答多个问题，返回的答案顺序与输入问题一致（保留给已有调用方，内部走批量流程）。"""
+    return await answer_questions_batch(questions)
 
 if __name__ == '__main__':
     # 示例调用
     question = "谷歌公司的创始人是谁？"
-    answer = answer_question_with_kg(question)
+    answer = asyncio.run(answer_question_with_kg(question))
     print(f"用户问题: {question}")
     print(f"最终答案: {answer}")
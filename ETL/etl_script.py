@@ -1,8 +1,18 @@
 import json
 import os
 import sys
+import csv
+import shlex
+import asyncio
+import argparse
+import subprocess
+import threading
+import time
+import itertools
 import decimal
 import datetime
+import functools
+from collections import defaultdict
 from dotenv import load_dotenv
 
 parent_path = os.path.dirname(os.path.abspath(__file__))
@@ -10,30 +20,82 @@ parent_path = os.path.dirname(os.path.abspath(__file__))
 # 提前导入数据库驱动，以便在异常捕获时可用
 try:
     import mysql.connector
+    import mysql.connector.pooling
     import psycopg2
     import psycopg2.extras  # 用于PostgreSQL的字典游标
-    from py2neo import Graph
+    from neo4j import GraphDatabase, AsyncGraphDatabase
 except ImportError:
-    print("错误: 未找到所需的库。请运行 'pip install mysql-connector-python psycopg2-binary py2neo python-dotenv'。")
+    print("错误: 未找到所需的库。请运行 'pip install mysql-connector-python psycopg2-binary neo4j python-dotenv'。")
     sys.exit(1)
 
+# 可选依赖：安装了 orjson 时用它读取配置文件，否则回退到标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# -----------------------------------------------------------------------------
+# JSON 读写
+# -----------------------------------------------------------------------------
+def read_json(path):
+    """读取 JSON 文件。"""
+    if orjson:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_json(path, data):
+    """
+    写出带缩进的 JSON 文件，非 ASCII 字符按 UTF-8 原样输出。
+    配置文件只写一次且需要人工编辑，固定用标准库按 4 空格缩进，输出不随是否安装 orjson 变化。
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
 # -----------------------------------------------------------------------------
 # 数据库连接器
 # -----------------------------------------------------------------------------
+# MySQL 连接池在首次取连接时创建；元数据抽取和各表的导入共用池中的连接，
+# 连接 close() 后归还给连接池，不必每次重新握手认证
+_mysql_pool = None
+_mysql_pool_lock = threading.Lock()
+# 导入时默认并发读取的源表数量；连接池至少为每张表留一个连接，另加一个供元数据查询使用
+DEFAULT_TABLE_CONCURRENCY = 4
+
+def _create_mysql_pool():
+    """创建 MySQL 连接池；池大小小于 Neo4jImporter.table_concurrency 时，多出的表会等待其他表读完归还连接。"""
+    return mysql.connector.pooling.MySQLConnectionPool(
+        pool_name="etl",
+        pool_size=max(int(os.getenv("DB_POOL_SIZE", "5")), DEFAULT_TABLE_CONCURRENCY + 1),
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME"),
+        # 非缓冲游标要求读完结果集后才能执行下一条语句，由驱动自动消费剩余结果
+        consume_results=True,
+        # 优先使用C扩展，批量拉取行时解析开销更低（不可用时驱动会回退到纯Python实现）
+        use_pure=False
+    )
+
 def get_db_connection():
     """根据 .env 文件中的配置建立并返回一个关系型数据库连接。"""
+    global _mysql_pool
     load_dotenv()
     db_type = os.getenv("DB_TYPE")
 
     if db_type == "mysql":
         try:
-            return mysql.connector.connect(
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                database=os.getenv("DB_NAME")
-            )
+            with _mysql_pool_lock:
+                if _mysql_pool is None:
+                    _mysql_pool = _create_mysql_pool()
+            while True:
+                try:
+                    return _mysql_pool.get_connection()
+                except mysql.connector.errors.PoolError:
+                    # 连接池已耗尽（DB_POOL_SIZE 小于并发读取的表数），等待其他表读完归还连接
+                    time.sleep(0.1)
         except mysql.connector.Error as err:
             print(f"MySQL数据库连接失败: {err}")
             sys.exit(1)
@@ -82,28 +144,36 @@ def extract_relational_schema():
         cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = %s", (schema_name,))
         tables = [row[0] for row in cursor.fetchall()]
 
-        for table_name in tables:
-            # 获取列
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-                ORDER BY ordinal_position
-            """, (schema_name, table_name))
-            columns = [row[0] for row in cursor.fetchall()]
-
-            # 获取主键
-            cursor.execute("""
-                SELECT k.column_name FROM information_schema.table_constraints t
+        # 一次查询取回所有表的列以及各列是否属于主键，按表名和列序排序后按表分组，
+        # 代替逐表分别查询列和主键的 2×表数 次往返
+        cursor.execute("""
+            SELECT c.table_name, c.column_name, pk.column_name IS NOT NULL AS is_pk
+            FROM information_schema.columns c
+            LEFT JOIN (
+                SELECT k.table_schema, k.table_name, k.column_name
+                FROM information_schema.table_constraints t
                 JOIN information_schema.key_column_usage k 
                   ON t.constraint_name = k.constraint_name 
                   AND t.table_schema = k.table_schema
                   AND t.table_name = k.table_name
-                WHERE t.constraint_type = 'PRIMARY KEY'
-                  AND t.table_schema = %s AND t.table_name = %s
-            """, (schema_name, table_name))
-            pk_result = cursor.fetchone()
-            primary_key = pk_result[0] if pk_result else None
-            
+                WHERE t.constraint_type = 'PRIMARY KEY' AND t.table_schema = %s
+            ) pk
+              ON pk.table_schema = c.table_schema
+              AND pk.table_name = c.table_name
+              AND pk.column_name = c.column_name
+            WHERE c.table_schema = %s
+            ORDER BY c.table_name, c.ordinal_position
+        """, (schema_name, schema_name))
+        columns_by_table = {}
+        for table_name, rows in itertools.groupby(cursor.fetchall(), key=lambda row: row[0]):
+            rows = list(rows)
+            columns = [row[1] for row in rows]
+            # 复合主键时取列序最靠前的一列
+            primary_key = next((row[1] for row in rows if row[2]), None)
+            columns_by_table[table_name] = (columns, primary_key)
+
+        for table_name in tables:
+            columns, primary_key = columns_by_table.get(table_name, ([], None))
             schema["tables"].append({
                 "name": table_name,
                 "columns": columns,
@@ -164,9 +234,15 @@ def generate_initial_config(schema):
         "nodes": [],
         "relationships": []
     }
-    
+
+    # 预先按源表建立外键索引、按表名建立表索引，避免在循环中反复扫描整个列表
+    fks_by_from = defaultdict(list)
+    for fk in schema['foreign_keys']:
+        fks_by_from[fk['from_table']].append(fk)
+    tables_by_name = {t['name']: t for t in schema['tables']}
+
     for table in schema["tables"]:
-        fk_columns = [fk['from_column'] for fk in schema['foreign_keys'] if fk['from_table'] == table['name']]
+        fk_columns = [fk['from_column'] for fk in fks_by_from[table['name']]]
         
         # 如果一个表的所有列都是外键且没有主键，则可能是一个纯粹的连接表
         if len(table['columns']) > 0 and len(table['columns']) == len(set(fk_columns)) and table['primary_key'] is None:
@@ -181,11 +257,10 @@ def generate_initial_config(schema):
         }
         config["nodes"].append(node_mapping)
 
+    entity_tables = {node['source_table'] for node in config['nodes']}
     processed_link_tables = set()
     for fk in schema["foreign_keys"]:
-        from_table_is_entity = any(
-            node['source_table'] == fk['from_table'] for node in config['nodes']
-        )
+        from_table_is_entity = fk['from_table'] in entity_tables
         
         if not from_table_is_entity:
             # 处理多对多关系的连接表
@@ -193,11 +268,11 @@ def generate_initial_config(schema):
             if link_table_name in processed_link_tables:
                 continue
 
-            related_fks = [f for f in schema['foreign_keys'] if f['from_table'] == link_table_name]
+            related_fks = fks_by_from[link_table_name]
             if len(related_fks) >= 2:
                 fk1, fk2 = related_fks[0], related_fks[1] 
                 
-                link_table_cols = next((t['columns'] for t in schema['tables'] if t['name'] == link_table_name), [])
+                link_table_cols = tables_by_name[link_table_name]['columns'] if link_table_name in tables_by_name else []
                 link_fk_cols = [f['from_column'] for f in related_fks]
                 prop_cols = [col for col in link_table_cols if col not in link_fk_cols]
 
@@ -223,23 +298,132 @@ def generate_initial_config(schema):
             config["relationships"].append(rel)
 
     config_path = os.path.join(parent_path, "config.json")
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
+    write_json(config_path, config)
 
     print(f"已生成初始配置文件 '{config_path}'。请打开并根据您的业务需求进行修改。")
 
 
+def quote_identifier(name):
+    """按 .env 中配置的数据库类型为表名/列名加上引号。"""
+    if os.getenv("DB_TYPE") == "postgresql":
+        return f'"{name}"'
+    return f"`{name}`"
+
 # -----------------------------------------------------------------------------
 # 数据类型转换工具函数
 # -----------------------------------------------------------------------------
+# 类型 -> 转换函数，按 type(value) 直接查表，避免对每个值逐个做 isinstance 判断。
+# 可以根据需要添加其他类型转换；值为 None 表示该类型无需转换。
+_CONVERTERS = {
+    decimal.Decimal: float,
+    datetime.date: datetime.date.isoformat,
+    datetime.datetime: datetime.datetime.isoformat,
+}
+_UNRESOLVED = object()
+
+def _converter_for(value_type):
+    """
+    返回类型对应的转换函数，无需转换时返回 None。
+    未登记的类型（如驱动返回的子类）沿 MRO 查找最近的已登记父类，结果登记到表中，之后直接命中。
+    """
+    converter = _CONVERTERS.get(value_type, _UNRESOLVED)
+    if converter is _UNRESOLVED:
+        converter = next((_CONVERTERS[base] for base in value_type.__mro__[1:] if _CONVERTERS.get(base)), None)
+        _CONVERTERS[value_type] = converter
+    return converter
+
 def convert_value_for_neo4j(value):
     """将一些特定的Python数据类型转换为Neo4j兼容的类型。"""
-    if isinstance(value, decimal.Decimal):
-        return float(value)
-    if isinstance(value, (datetime.date, datetime.datetime)):
-        return value.isoformat()
-    # 可以根据需要添加其他类型转换
-    return value
+    converter = _converter_for(type(value))
+    return converter(value) if converter else value
+
+def rows_to_columns(rows, prop_items):
+    """
+    按列将一批结果行转换为 {Neo4j 属性名: 取值列表}。
+    同一列的值类型一致，因此每列只用首个非空值判断一次是否需要转换，
+    无需转换的列（整数、字符串等）直接整列复制，不再逐个单元格调用转换函数。
+    """
+    columns = {}
+    for rdb_col, neo4j_prop in prop_items:
+        values = [row.get(rdb_col) for row in rows]
+        sample = next((v for v in values if v is not None), None)
+        converter = _converter_for(type(sample)) if sample is not None else None
+        if converter:
+            values = [None if v is None else converter(v) for v in values]
+        columns[neo4j_prop] = values
+    return columns
+
+def rows_to_props(rows, prop_items):
+    """按列转换一批结果行，再组装为每行一个的 Neo4j 属性字典列表。"""
+    if not prop_items:
+        return [{} for _ in rows]
+    columns = rows_to_columns(rows, prop_items)
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def neo4j_csv_type(value):
+    """返回 neo4j-admin import 表头中与已转换取值对应的属性类型。"""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "long"
+    if isinstance(value, float):
+        return "double"
+    return "string"
+
+# -----------------------------------------------------------------------------
+# Cypher 语句构造（按参数缓存，同一标签/关系类型的所有批次复用同一查询文本）
+# 整个批次一次发送，由 Neo4j 服务端按 tx_rows 行分段提交（需要 Neo4j 4.4+）
+# -----------------------------------------------------------------------------
+# 随节点写入外键关系时，目标表可能尚未导入，先按主键创建带此标记的占位节点；
+# 目标表导入时清除标记，节点阶段结束后仍带标记的占位节点（外键指向不存在的行）连同关系一起删除，
+# 与单独导入关系时 MATCH 不到目标节点就跳过的语义一致
+PLACEHOLDER_PROPERTY = "_etl_placeholder"
+
+@functools.lru_cache(maxsize=256)
+def _node_merge_query(label, id_prop, props, fk_rels, clear_placeholder, tx_rows):
+    # 属性以列的形式传入（$cols 中每个属性对应一个等长列表），按下标逐行取值
+    assignments = ", ".join(f"`{prop}`: $cols.`{prop}`[i]" for prop in props)
+    # 随节点一并写入的外键关系（$fks 中每个关系对应一列外键值）：外键非空时合并目标节点与关系。
+    # 目标节点不存在时创建占位节点（见 PLACEHOLDER_PROPERTY），导入目标表时再补全属性。
+    rel_clauses = "".join(f"""
+            FOREACH (to_id IN CASE WHEN $fks.`{key}`[i] IS NULL THEN [] ELSE [$fks.`{key}`[i]] END |
+                MERGE (t:`{to_label}` {{`{to_pk}`: to_id}})
+                ON CREATE SET t.`{PLACEHOLDER_PROPERTY}` = true
+                MERGE (n)-[r:`{rel_type}`]->(t)
+                SET r = $rel_props.`{key}`)""" for key, to_label, to_pk, rel_type in fk_rels)
+    # 只有作为外键目标的标签才可能存在占位节点，其他标签不必为每个节点多写一次属性
+    remove_clause = f"\n            REMOVE n.`{PLACEHOLDER_PROPERTY}`" if clear_placeholder else ""
+    return f"""
+        UNWIND range(0, size($cols.`{id_prop}`) - 1) AS i
+        CALL {{
+            WITH i
+            MERGE (n:`{label}` {{`{id_prop}`: $cols.`{id_prop}`[i]}})
+            SET n += {{{assignments}}}{remove_clause}{rel_clauses}
+        }} IN TRANSACTIONS OF {tx_rows} ROWS
+        """
+
+@functools.lru_cache(maxsize=256)
+def _placeholder_cleanup_query(label, tx_rows):
+    return f"""
+        MATCH (t:`{label}`) WHERE t.`{PLACEHOLDER_PROPERTY}` IS NOT NULL
+        CALL {{
+            WITH t
+            DETACH DELETE t
+        }} IN TRANSACTIONS OF {tx_rows} ROWS
+        """
+
+@functools.lru_cache(maxsize=256)
+def _rel_merge_query(from_label, from_pk, to_label, to_pk, rel_type, tx_rows):
+    return f"""
+        UNWIND $data AS map
+        CALL {{
+            WITH map
+            MATCH (a:`{from_label}` {{`{from_pk}`: map.from_id}})
+            MATCH (b:`{to_label}` {{`{to_pk}`: map.to_id}})
+            MERGE (a)-[r:`{rel_type}`]->(b)
+            SET r = map.props
+        }} IN TRANSACTIONS OF {tx_rows} ROWS
+        """
 
 # -----------------------------------------------------------------------------
 # 步骤 3 & 4: 读取配置并执行数据导入
@@ -250,193 +434,573 @@ class Neo4jImporter:
         self.neo4j_uri = os.getenv("NEO4J_URI")
         self.neo4j_user = os.getenv("NEO4J_USER")
         self.neo4j_pass = os.getenv("NEO4J_PASS")
-        self.neo4j_graph = None
-        self.batch_size = 1000  # 批量处理大小
+        self.neo4j_database = os.getenv("NEO4J_DATABASE", "neo4j")
+        self.neo4j_driver = None
+        self.batch_size = 10000  # 批量处理大小：每次从关系型数据库拉取并发送给 Neo4j 的行数
+        self.tx_rows = 1000  # Neo4j 服务端每个子事务提交的行数
+        self.concurrency = 8  # 并发写入 Neo4j 的消费者数量
+        self.table_concurrency = DEFAULT_TABLE_CONCURRENCY  # 并发读取的源表数量
+        self.max_retries = 3  # 单个批次遇到可重试错误（死锁、连接中断等）时的最大尝试次数
+        self.failed_batches = 0  # 本次导入中最终写入失败的批次数
 
     def connect(self):
         """连接到 Neo4j 数据库。"""
         try:
-            self.neo4j_graph = Graph(self.neo4j_uri, auth=(self.neo4j_user, self.neo4j_pass))
+            self.neo4j_driver = GraphDatabase.driver(self.neo4j_uri, auth=(self.neo4j_user, self.neo4j_pass))
             # 验证连接
-            self.neo4j_graph.run("RETURN 1")
+            self.neo4j_driver.verify_connectivity()
             print("Neo4j 数据库连接成功。")
             return True
         except Exception as e:
             print(f"Neo4j 数据库连接失败: {e}")
             return False
 
-    def import_data(self, config_path=os.path.join(parent_path, "config.json")):
-        """根据配置文件从关系型数据库导入数据到Neo4j。"""
-        if not self.neo4j_graph:
-            print("无法执行导入，Neo4j 数据库未连接。")
-            return
+    def close(self):
+        """关闭 Neo4j 驱动。"""
+        if self.neo4j_driver:
+            self.neo4j_driver.close()
+            self.neo4j_driver = None
+
+    def is_database_empty(self):
+        """判断目标 Neo4j 数据库中是否还没有任何节点。"""
+        with self.neo4j_driver.session(database=self.neo4j_database) as session:
+            return session.run("MATCH (n) RETURN n LIMIT 1").single() is None
 
+    def _load_config(self, config_path):
+        """读取映射配置文件，文件不存在时返回 None。"""
         try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                schema_config = json.load(f)
+            return read_json(config_path)
         except FileNotFoundError:
             print(f"错误: 配置文件 '{config_path}' 不存在。请先运行脚本生成它。")
-            return
+            return None
 
-        rdb_conn = get_db_connection()
-        db_type = os.getenv("DB_TYPE")
+    def _link_fk_columns(self, schema_config, schema):
+        """
+        返回 (源表, 目标表) -> 外键列 的映射，用于查找中间表指向两端节点表的外键列。
+        schema 未提供且配置中存在中间表关系时会重新抽取元数据。
+        """
+        if schema is None and any("source_link_table" in r for r in schema_config["relationships"]):
+            schema = extract_relational_schema()
+        return {
+            (fk['from_table'], fk['to_table']): fk['from_column']
+            for fk in (schema or {}).get('foreign_keys', [])
+        }
 
-        # 根据数据库类型创建游标和标识符引用函数
+    def _cursor_factory(self, rdb_conn):
+        """
+        根据数据库类型返回游标工厂，不支持的类型返回 None。
+        两种数据库都使用流式游标：结果集不在客户端整体缓冲，而是按 batch_size 逐批拉取。
+        """
+        db_type = os.getenv("DB_TYPE")
         if db_type == "mysql":
-            rdb_cursor = rdb_conn.cursor(dictionary=True, buffered=True)
-            def quote_id(name): return f"`{name}`"
+            def open_cursor():
+                # 预处理语句游标走二进制协议传输结果行，省去逐列的文本解析
+                cursor = rdb_conn.cursor(prepared=True, dictionary=True)
+                cursor.arraysize = self.batch_size
+                return cursor
         elif db_type == "postgresql":
-            rdb_cursor = rdb_conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-            def quote_id(name): return f'"{name}"'
+            # 命名游标即服务端游标，每个命名游标只能执行一次查询，因此每次查询使用新名称
+            cursor_names = (f"etl_cursor_{i}" for i in itertools.count())
+            def open_cursor():
+                cursor = rdb_conn.cursor(name=next(cursor_names), cursor_factory=psycopg2.extras.DictCursor)
+                cursor.itersize = cursor.arraysize = self.batch_size
+                return cursor
         else:
             print(f"错误: 不支持的数据库类型 '{db_type}' 用于数据导入。")
+            return None
+        return open_cursor
+
+    def import_data(self, config_path=os.path.join(parent_path, "config.json"), schema=None):
+        """
+        根据配置文件从关系型数据库导入数据到Neo4j。
+        schema 为 extract_relational_schema() 的结果，用于定位中间表的外键列；
+        未提供且配置中存在中间表关系时会重新抽取。
+        """
+        if not self.neo4j_driver:
+            print("无法执行导入，Neo4j 数据库未连接。")
+            return
+        asyncio.run(self.import_data_async(config_path, schema))
+
+    async def import_data_async(self, config_path=os.path.join(parent_path, "config.json"), schema=None):
+        """
+        导入流程的异步实现：多张表的生产者并发地在线程中用 fetchmany 读取关系型数据库，
+        将批次放入有界队列，多个消费者协程并发地向 Neo4j 提交 UNWIND 批次。
+        """
+        schema_config = self._load_config(config_path)
+        if schema_config is None:
+            return
+        fk_by_pair = self._link_fk_columns(schema_config, schema)
+        node_cfg_by_table = {n['source_table']: n for n in schema_config['nodes']}
+        self.failed_batches = 0
+
+        async with AsyncGraphDatabase.driver(self.neo4j_uri, auth=(self.neo4j_user, self.neo4j_pass)) as driver:
+            constrained_labels = await self._ensure_constraints(driver, schema_config)
+            inline_rels_by_table, rel_defs = self._split_inline_rels(schema_config, node_cfg_by_table, constrained_labels)
+            # 随节点写入的外键关系所指向的标签，这些标签下可能出现占位节点
+            placeholder_labels = {rel["to_label"] for inline_rels in inline_rels_by_table.values() for rel in inline_rels}
+
+            # 队列容量为消费者数量的两倍，读取速度快于写入时对生产者形成背压
+            queue = asyncio.Queue(maxsize=2 * self.concurrency)
+            workers = [asyncio.create_task(self._batch_worker(driver, queue)) for _ in range(self.concurrency)]
+            # 同时读取的表数量上限，每张表占用一个独立的数据库连接
+            table_slots = asyncio.Semaphore(self.table_concurrency)
+            try:
+                # 1. 导入节点及随节点表携带的外键关系（各表并发读取）
+                print("\n--- 开始批量导入节点 ---")
+                await asyncio.gather(*(
+                    self._produce_node_batches(node_def, inline_rels_by_table[node_def["source_table"]],
+                                               node_def["label"] in placeholder_labels, queue, table_slots)
+                    for node_def in schema_config["nodes"]
+                ))
+                # 关系需要 MATCH 到两端节点，等待所有节点批次写入完成后再开始
+                await queue.join()
+                await self._remove_placeholders(driver, placeholder_labels)
+
+                # 2. 导入关系（各表并发读取）
+                print("\n--- 开始批量导入关系 ---")
+                await asyncio.gather(*(
+                    self._produce_rel_batches(rel_def, node_cfg_by_table, fk_by_pair, queue, table_slots)
+                    for rel_def in rel_defs
+                ))
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        if self.failed_batches:
+            print(f"\n数据导入结束，但有 {self.failed_batches} 个批次写入失败，导入结果不完整，请检查上方的错误信息。")
+        else:
+            print("\n所有数据导入完成。")
+
+    def _split_inline_rels(self, schema_config, node_cfg_by_table, constrained_labels):
+        """
+        找出可以在读取节点表时一并写入的一对多关系：外键列就在源节点表中，
+        节点批次顺带携带外键值，省去第二遍读取源表和关系两端的 MATCH。
+        目标节点会被多张表并发 MERGE，只有目标标签建立了唯一约束（constrained_labels）时才随节点写入，
+        否则可能产生重复的目标节点。
+        返回 (源表 -> 随节点写入的关系列表, 仍需单独导入的关系定义列表)。
+        """
+        inline_rels_by_table = defaultdict(list)
+        rel_defs = []
+        for rel_def in schema_config["relationships"]:
+            from_node_config = node_cfg_by_table.get(rel_def["from_node_table"])
+            to_node_config = node_cfg_by_table.get(rel_def["to_node_table"])
+            if "source_foreign_key" in rel_def and from_node_config and to_node_config \
+                    and from_node_config["primary_key"] and to_node_config["primary_key"] \
+                    and to_node_config["label"] in constrained_labels:
+                source_table_name, fk_column = rel_def["source_foreign_key"].split('.')
+                if source_table_name == rel_def["from_node_table"]:
+                    inline_rels = inline_rels_by_table[source_table_name]
+                    inline_rels.append({
+                        "key": f"r{len(inline_rels)}",
+                        "fk_column": fk_column,
+                        "to_label": to_node_config["label"],
+                        "to_pk": to_node_config["primary_key"],
+                        "type": rel_def["type"],
+                        "properties": rel_def.get("properties", {}),
+                    })
+                    continue
+            rel_defs.append(rel_def)
+        return inline_rels_by_table, rel_defs
+
+    async def _ensure_constraints(self, driver, schema_config):
+        """
+        导入前为每个节点标签的主键建立唯一约束（约束自带索引），
+        节点 MERGE 和关系两端的 MATCH 因此都走索引查找，并发 MERGE 也不会产生重复节点。
+        已有数据存在重复主键、无法建立约束时，退而建立普通索引；索引也无法建立时（如缺少权限）跳过该标签。
+        返回成功建立唯一约束的标签集合。
+        """
+        constrained_labels = set()
+        async with driver.session(database=self.neo4j_database) as session:
+            for node_def in schema_config["nodes"]:
+                label = node_def["label"]
+                id_prop = node_def["primary_key"]
+                if not id_prop:
+                    continue
+                try:
+                    result = await session.run(
+                        f"CREATE CONSTRAINT IF NOT EXISTS FOR (n:`{label}`) REQUIRE n.`{id_prop}` IS UNIQUE")
+                    await result.consume()
+                    constrained_labels.add(label)
+                except Exception as e:
+                    print(f"警告: 无法为 {label}.{id_prop} 建立唯一约束，改为建立索引: {e}")
+                    try:
+                        result = await session.run(f"CREATE INDEX IF NOT EXISTS FOR (n:`{label}`) ON (n.`{id_prop}`)")
+                        await result.consume()
+                    except Exception as e:
+                        # 如没有建立索引的权限：不建索引继续导入，只是 MERGE / MATCH 会退化为按标签扫描
+                        print(f"警告: 无法为 {label}.{id_prop} 建立索引，将在无索引的情况下导入: {e}")
+        return constrained_labels
+
+    async def _remove_placeholders(self, driver, labels):
+        """删除 labels 中随节点写入关系时创建、但目标表中并不存在对应行的占位节点及其关系。"""
+        if not labels:
+            return
+        async with driver.session(database=self.neo4j_database) as session:
+            for label in sorted(labels):
+                await self._run_write(session, _placeholder_cleanup_query(label, self.tx_rows), f"清理占位节点 {label}")
+
+    async def _fetch_batches(self, query):
+        """
+        在线程中执行查询，并以 batch_size 为单位逐批产出结果行。
+        每次查询使用独立的数据库连接，多张表因此可以并发读取。
+        """
+        rdb_conn = await asyncio.to_thread(get_db_connection)
+        try:
+            cursor = self._cursor_factory(rdb_conn)()
+            try:
+                await asyncio.to_thread(cursor.execute, query)
+                while True:
+                    rows = await asyncio.to_thread(cursor.fetchmany, self.batch_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cursor.close()
+        finally:
+            rdb_conn.close()
+
+    async def _produce_node_batches(self, node_def, inline_rels, clear_placeholder, queue, table_slots):
+        """
+        生产者：读取一张节点表，把每个批次（连同 inline_rels 对应的外键列）交给写入队列。
+        clear_placeholder 表示该标签是随节点写入关系的目标，写入时需清除占位标记。
+        """
+        table_name = node_def["source_table"]
+        node_label = node_def["label"]
+        id_property = node_def["primary_key"]
+        properties_map = node_def["properties"]
+
+        if not id_property:
+            print(f"警告: 表 '{table_name}' 没有主键，无法作为节点导入。跳过。")
+            return
+
+        async with table_slots:
+            if inline_rels:
+                rel_types = ", ".join(rel["type"] for rel in inline_rels)
+                print(f"正在从表 '{table_name}' 导入节点及关系 {rel_types}...")
+            else:
+                print(f"正在从表 '{table_name}' 导入节点...")
+
+            # 属性映射在循环外展开一次，每批按列转换，批大小同时作为 fetchmany 与 UNWIND 的宽度
+            prop_items = list(properties_map.items())
+            fk_items = [(rel["fk_column"], rel["key"]) for rel in inline_rels]
+            fk_rels = tuple((rel["key"], rel["to_label"], rel["to_pk"], rel["type"]) for rel in inline_rels)
+            rel_props = {rel["key"]: rel["properties"] for rel in inline_rels}
+            async for rows in self._fetch_batches(f"SELECT * FROM {quote_identifier(table_name)}"):
+                node_columns = rows_to_columns(rows, prop_items)
+                fk_columns = rows_to_columns(rows, fk_items)
+                await queue.put((self._merge_nodes_batch,
+                                 (node_label, id_property, node_columns, fk_rels, fk_columns, rel_props, clear_placeholder)))
+
+            print(f"从表 '{table_name}' 的节点已全部读取。")
+
+    async def _produce_rel_batches(self, rel_def, node_cfg_by_table, fk_by_pair, queue, table_slots):
+        """生产者：读取一个关系定义对应的源表，把每个批次交给写入队列。"""
+        from_table = rel_def["from_node_table"]
+        to_table = rel_def["to_node_table"]
+        rel_type = rel_def["type"]
+
+        from_node_config = node_cfg_by_table.get(from_table)
+        to_node_config = node_cfg_by_table.get(to_table)
+
+        if not from_node_config or not to_node_config:
+            print(f"警告: 无法找到关系 '{rel_type}' 的源或目标节点配置，跳过。")
+            return
+
+        from_label = from_node_config['label']
+        from_pk = from_node_config['primary_key']
+        to_label = to_node_config['label']
+        to_pk = to_node_config['primary_key']
+
+        if "source_foreign_key" in rel_def:
+            source_table_name, fk_column = rel_def["source_foreign_key"].split('.')
+            rel_properties_map = rel_def.get("properties", {})
+
+            async with table_slots:
+                print(f"正在基于表 '{source_table_name}' 批量创建关系 '{rel_type}'...")
+                query = f"SELECT {quote_identifier(from_pk)}, {quote_identifier(fk_column)} FROM {quote_identifier(source_table_name)}"
+                async for rows in self._fetch_batches(query):
+                    # 两端的键按节点主键相同的规则转换（如 Decimal -> float），否则 MATCH 不到已导入的节点
+                    keys = rows_to_columns(rows, [(from_pk, "from"), (fk_column, "to")])
+                    rel_data_list = [
+                        {"from_id": from_id, "to_id": to_id, "props": rel_properties_map}
+                        for from_id, to_id in zip(keys["from"], keys["to"])
+                        if from_id is not None and to_id is not None
+                    ]
+                    await queue.put((self._merge_rels_batch, (from_label, from_pk, to_label, to_pk, rel_type, rel_data_list)))
+
+        elif "source_link_table" in rel_def:
+            link_table_name = rel_def["source_link_table"]
+
+            # 动态查找外键列
+            from_fk_col = fk_by_pair.get((link_table_name, from_table))
+            to_fk_col = fk_by_pair.get((link_table_name, to_table))
+
+            if not from_fk_col or not to_fk_col:
+                print(f"警告: 无法找到中间表 '{link_table_name}' 的外键列，跳过关系 '{rel_type}'。")
+                return
+
+            async with table_slots:
+                print(f"正在基于中间表 '{link_table_name}' 批量创建关系 '{rel_type}'...")
+                rel_prop_items = list(rel_def.get("properties", {}).items())
+                async for rows in self._fetch_batches(f"SELECT * FROM {quote_identifier(link_table_name)}"):
+                    keys = rows_to_columns(rows, [(from_fk_col, "from"), (to_fk_col, "to")])
+                    rel_data_list = [
+                        {"from_id": from_id, "to_id": to_id, "props": props}
+                        for from_id, to_id, props in zip(keys["from"], keys["to"], rows_to_props(rows, rel_prop_items))
+                        if from_id is not None and to_id is not None
+                    ]
+                    await queue.put((self._merge_rels_batch, (from_label, from_pk, to_label, to_pk, rel_type, rel_data_list)))
+
+    async def _batch_worker(self, driver, queue):
+        """消费者：持有独立会话，不断从队列取出批次并写入 Neo4j。"""
+        async with driver.session(database=self.neo4j_database) as session:
+            while True:
+                merge_batch, args = await queue.get()
+                try:
+                    await merge_batch(session, *args)
+                finally:
+                    queue.task_done()
+
+    async def _run_write(self, session, query, description, **params):
+        """
+        以自动提交事务执行批量写入（CALL ... IN TRANSACTIONS 不能在显式事务中运行）。
+        各批次相互独立，仅对驱动判定为可重试的错误（死锁等临时性错误、连接中断或会话过期）重试当前批次，
+        并按指数退避等待；MERGE 是幂等的，部分提交后重试也是安全的。其他错误直接记为失败批次。
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                result = await session.run(query, **params)
+                await result.consume()
+                return
+            except Exception as e:
+                error = e
+                if attempt == self.max_retries or not getattr(e, "is_retryable", lambda: False)():
+                    break
+                await asyncio.sleep(2 ** attempt)
+        self.failed_batches += 1
+        print(f"{description} 失败: {error}")
+
+    async def _merge_nodes_batch(self, session, label, id_prop, columns, fk_rels, fk_columns, rel_props, clear_placeholder):
+        """
+        使用UNWIND批量创建/更新节点，并同时合并 fk_rels 描述的外键关系。
+        columns 为 {属性名: 取值列表}，fk_columns 为 {关系键: 外键值列表}，
+        整批只传几个列表，不必为每行构造一个属性字典。
+        """
+        ids = columns.get(id_prop)
+        if not ids: return
+        if None in ids:
+            keep = [i for i, v in enumerate(ids) if v is not None]
+            if not keep: return
+            columns = {prop: [values[i] for i in keep] for prop, values in columns.items()}
+            fk_columns = {key: [values[i] for i in keep] for key, values in fk_columns.items()}
+
+        query = _node_merge_query(label, id_prop, tuple(columns), fk_rels, clear_placeholder, self.tx_rows)
+        await self._run_write(session, query, f"批量创建节点 {label}",
+                              cols=columns, fks=fk_columns, rel_props=rel_props)
+
+    async def _merge_rels_batch(self, session, from_label, from_pk, to_label, to_pk, rel_type, data_list):
+        """使用UNWIND批量创建关系。"""
+        if not data_list: return
+        
+        query = _rel_merge_query(from_label, from_pk, to_label, to_pk, rel_type, self.tx_rows)
+        await self._run_write(session, query, f"批量创建关系 {rel_type}", data=data_list)
+
+    # -------------------------------------------------------------------------
+    # 首次全量导入：导出 CSV 后由 neo4j-admin 离线导入
+    # -------------------------------------------------------------------------
+    def import_bulk_via_csv(self, config_path=os.path.join(parent_path, "config.json"), schema=None):
+        """
+        首次导入空数据库时，把节点和关系导出为 CSV，再调用 neo4j-admin database import 离线导入，
+        省去 MERGE 逐行查索引的开销。目标数据库非空时回退到增量的 UNWIND 导入。
+        neo4j-admin 要求目标数据库处于停止状态，可通过 NEO4J_ADMIN 指定命令，CSV 目录 NEO4J_BULK_DIR 需对该命令可见。
+        使用本项目的 docker-compose 时，Neo4j 是容器的主进程，停止数据库即停止容器，无法再 docker exec；
+        可先 'docker compose stop neo4j'，再用同一镜像起一个临时容器执行导入，挂载数据目录，
+        并把 CSV 目录按相同路径挂载（命令中的文件路径是本机绝对路径），例如：
+        NEO4J_ADMIN='docker run --rm -v /home/lychee/kg/neo4j_database/data:/data
+                     -v <CSV 目录绝对路径>:<CSV 目录绝对路径> <neo4j 镜像> neo4j-admin'
+        导入完成后 'docker compose start neo4j'。
+        """
+        if not self.neo4j_driver:
+            print("无法执行导入，Neo4j 数据库未连接。")
+            return
+        if not self.is_database_empty():
+            print("目标 Neo4j 数据库非空，无法离线导入，改用增量导入。")
+            self.import_data(config_path, schema)
             return
 
-        # 1. 导入节点（批量处理）
-        print("\n--- 开始批量导入节点 ---")
+        schema_config = self._load_config(config_path)
+        if schema_config is None:
+            return
+        fk_by_pair = self._link_fk_columns(schema_config, schema)
+
+        bulk_dir = os.getenv("NEO4J_BULK_DIR", os.path.join(parent_path, "bulk_import"))
+        os.makedirs(bulk_dir, exist_ok=True)
+
+        rdb_conn = get_db_connection()
+        try:
+            open_cursor = self._cursor_factory(rdb_conn)
+            if open_cursor is None:
+                return
+            import_args = self._export_bulk_csv(open_cursor, schema_config, fk_by_pair, bulk_dir)
+        finally:
+            rdb_conn.close()
+
+        command = shlex.split(os.getenv("NEO4J_ADMIN", "neo4j-admin")) + [
+            "database", "import", "full",
+            "--overwrite-destination=true",
+            "--multiline-fields=true",
+            # 空字段即 NULL，与 MERGE 导入中值为 None 的属性不写入保持一致
+            "--ignore-empty-strings=true",
+            # 与增量导入的 MERGE / MATCH 语义保持一致：重复节点和悬空关系直接跳过
+            "--skip-duplicate-nodes=true",
+            "--skip-bad-relationships=true",
+            # 默认最多容忍 1000 条重复节点/悬空关系，超过即中止；默认不设上限，可通过 NEO4J_BAD_TOLERANCE 调整
+            f"--bad-tolerance={os.getenv('NEO4J_BAD_TOLERANCE', sys.maxsize)}",
+            *import_args,
+            self.neo4j_database,
+        ]
+        print(f"\nCSV 已导出到 {bulk_dir}，离线导入命令:\n{shlex.join(command)}")
+        # neo4j-admin 不能在数据库运行时写入，由用户停止数据库后再继续
+        answer = input(f"请先停止数据库 '{self.neo4j_database}'，然后按Enter键执行上述命令（输入 n 跳过，稍后手动执行）: ")
+        if answer.strip().lower() == "n":
+            print("已跳过离线导入。")
+            return
+        result = subprocess.run(command)
+        if result.returncode == 0:
+            print("\n离线导入完成，重新启动数据库后即可使用。")
+        else:
+            print(f"\nneo4j-admin 导入失败，退出码 {result.returncode}。")
+
+    def _export_bulk_csv(self, open_cursor, schema_config, fk_by_pair, bulk_dir):
+        """把所有节点和关系导出为 neo4j-admin 格式的 CSV，返回对应的 --nodes / --relationships 参数。"""
+        import_args = []
+
+        print("\n--- 开始导出节点 CSV ---")
+        node_cfg_by_table = {n['source_table']: n for n in schema_config['nodes']}
         for node_def in schema_config["nodes"]:
             table_name = node_def["source_table"]
             node_label = node_def["label"]
             id_property = node_def["primary_key"]
-            properties_map = node_def["properties"]
-
             if not id_property:
                 print(f"警告: 表 '{table_name}' 没有主键，无法作为节点导入。跳过。")
                 continue
 
-            print(f"正在从表 '{table_name}' 导入节点...")
-            rdb_cursor.execute(f"SELECT * FROM {quote_id(table_name)}")
-            
-            node_props_list = []
-            for row in rdb_cursor:
-                node_props = {
-                    neo4j_prop: convert_value_for_neo4j(row.get(rdb_col))
-                    for rdb_col, neo4j_prop in properties_map.items()
-                }
-                node_props_list.append(node_props)
-                
-                if len(node_props_list) >= self.batch_size:
-                    self._merge_nodes_batch(node_label, id_property, node_props_list)
-                    node_props_list = []
-            
-            if node_props_list:
-                self._merge_nodes_batch(node_label, id_property, node_props_list)
+            print(f"正在导出表 '{table_name}' 的节点...")
+            prop_items = list(node_def["properties"].items())
+            # 不命名的 :ID 列只用于关联关系，不会写成属性；主键属性按其真实类型单独存储
+            id_column = f":ID({node_label})"
+            data_file = os.path.join(bulk_dir, f"nodes_{node_label}.csv")
+            prop_types = self._export_csv(
+                open_cursor, f"SELECT * FROM {quote_identifier(table_name)}", data_file,
+                lambda rows: [
+                    (str(props[id_property]), props)
+                    for props in rows_to_props(rows, prop_items)
+                    if props.get(id_property) is not None
+                ])
+            header = [id_column] + [f"{prop}:{prop_types.get(prop, 'string')}" for _, prop in prop_items]
+            header_file = self._write_csv_header(bulk_dir, f"nodes_{node_label}", header)
+            import_args.append(f"--nodes={node_label}={header_file},{data_file}")
 
-            print(f"从表 '{table_name}' 导入节点完成。")
-
-        # 2. 导入关系（批量处理）
-        print("\n--- 开始批量导入关系 ---")
-        for rel_def in schema_config["relationships"]:
-            from_table = rel_def["from_node_table"]
-            to_table = rel_def["to_node_table"]
+        print("\n--- 开始导出关系 CSV ---")
+        for rel_index, rel_def in enumerate(schema_config["relationships"]):
+            from_node_config = node_cfg_by_table.get(rel_def["from_node_table"])
+            to_node_config = node_cfg_by_table.get(rel_def["to_node_table"])
             rel_type = rel_def["type"]
-            
-            from_node_config = next((n for n in schema_config['nodes'] if n['source_table'] == from_table), None)
-            to_node_config = next((n for n in schema_config['nodes'] if n['source_table'] == to_table), None)
-            
             if not from_node_config or not to_node_config:
                 print(f"警告: 无法找到关系 '{rel_type}' 的源或目标节点配置，跳过。")
                 continue
-                
-            from_label = from_node_config['label']
-            from_pk = from_node_config['primary_key']
-            to_label = to_node_config['label']
-            to_pk = to_node_config['primary_key']
+            ends = [f":START_ID({from_node_config['label']})", f":END_ID({to_node_config['label']})"]
 
             if "source_foreign_key" in rel_def:
                 source_table_name, fk_column = rel_def["source_foreign_key"].split('.')
-                rel_properties_map = rel_def.get("properties", {}) 
+                # 同一关系类型可能来自多个外键，文件名带上序号和源表以免相互覆盖
+                file_stem = f"rels_{rel_index}_{source_table_name}_{rel_type}"
+                data_file = os.path.join(bulk_dir, f"{file_stem}.csv")
+                from_pk = from_node_config['primary_key']
+                # 一对多关系的属性是配置中给定的常量
+                rel_props = rel_def.get("properties", {})
+                query = f"SELECT {quote_identifier(from_pk)}, {quote_identifier(fk_column)} FROM {quote_identifier(source_table_name)}"
 
-                print(f"正在基于表 '{source_table_name}' 批量创建关系 '{rel_type}'...")
-                query = f"SELECT {quote_id(from_pk)}, {quote_id(fk_column)} FROM {quote_id(source_table_name)}"
-                rdb_cursor.execute(query)
-                
-                rel_data_list = []
-                for row in rdb_cursor:
-                    if row.get(from_pk) is not None and row.get(fk_column) is not None:
-                        rel_data_list.append({
-                            "from_id": row.get(from_pk),
-                            "to_id": row.get(fk_column),
-                            "props": rel_properties_map
-                        })
-                    if len(rel_data_list) >= self.batch_size:
-                        self._merge_rels_batch(from_label, from_pk, to_label, to_pk, rel_type, rel_data_list)
-                        rel_data_list = []
-                if rel_data_list:
-                    self._merge_rels_batch(from_label, from_pk, to_label, to_pk, rel_type, rel_data_list)
-            
+                def to_records(rows):
+                    # 两端的键按节点主键相同的规则转换后再转为字符串，保证与节点 :ID 列一致
+                    keys = rows_to_columns(rows, [(from_pk, "from"), (fk_column, "to")])
+                    return [
+                        (str(from_id), str(to_id), rel_props)
+                        for from_id, to_id in zip(keys["from"], keys["to"])
+                        if from_id is not None and to_id is not None
+                    ]
+                prop_types = self._export_csv(open_cursor, query, data_file, to_records)
+                prop_names = list(rel_props)
             elif "source_link_table" in rel_def:
                 link_table_name = rel_def["source_link_table"]
-                
-                # 动态查找外键列
-                from_fk_col = next((fk['from_column'] for fk in schema_data['foreign_keys'] if fk['from_table'] == link_table_name and fk['to_table'] == from_table), None)
-                to_fk_col = next((fk['from_column'] for fk in schema_data['foreign_keys'] if fk['from_table'] == link_table_name and fk['to_table'] == to_table), None)
-
+                from_fk_col = fk_by_pair.get((link_table_name, rel_def["from_node_table"]))
+                to_fk_col = fk_by_pair.get((link_table_name, rel_def["to_node_table"]))
                 if not from_fk_col or not to_fk_col:
                     print(f"警告: 无法找到中间表 '{link_table_name}' 的外键列，跳过关系 '{rel_type}'。")
                     continue
-                
-                print(f"正在基于中间表 '{link_table_name}' 批量创建关系 '{rel_type}'...")
-                rdb_cursor.execute(f"SELECT * FROM {quote_id(link_table_name)}")
-                
-                rel_data_list = []
-                for row in rdb_cursor:
-                    if row.get(from_fk_col) is not None and row.get(to_fk_col) is not None:
-                        rel_props = {
-                            neo4j_prop: convert_value_for_neo4j(row.get(rdb_col))
-                            for rdb_col, neo4j_prop in rel_def.get("properties", {}).items()
-                        }
-                        rel_data_list.append({
-                            "from_id": row.get(from_fk_col),
-                            "to_id": row.get(to_fk_col),
-                            "props": rel_props
-                        })
-                    if len(rel_data_list) >= self.batch_size:
-                        self._merge_rels_batch(from_label, from_pk, to_label, to_pk, rel_type, rel_data_list)
-                        rel_data_list = []
-                if rel_data_list:
-                    self._merge_rels_batch(from_label, from_pk, to_label, to_pk, rel_type, rel_data_list)
-        
-        print("\n所有数据导入完成。")
-        rdb_cursor.close()
-        rdb_conn.close()
-
-    def _merge_nodes_batch(self, label, id_prop, prop_list):
-        """使用UNWIND批量创建/更新节点。"""
-        if not prop_list: return
-        valid_props = [p for p in prop_list if p.get(id_prop) is not None]
-        if not valid_props: return
-
-        query = f"""
-        UNWIND $props AS map
-        MERGE (n:`{label}` {{`{id_prop}`: map.`{id_prop}`}})
-        SET n += map
-        """
-        try:
-            self.neo4j_graph.run(query, props=valid_props)
-        except Exception as e:
-            print(f"批量创建节点 {label} 失败: {e}")
+                file_stem = f"rels_{rel_index}_{link_table_name}_{rel_type}"
+                data_file = os.path.join(bulk_dir, f"{file_stem}.csv")
+                rel_prop_items = list(rel_def.get("properties", {}).items())
 
-    def _merge_rels_batch(self, from_label, from_pk, to_label, to_pk, rel_type, data_list):
-        """使用UNWIND批量创建关系。"""
-        if not data_list: return
-        
-        query = f"""
-        UNWIND $data AS map
-        MATCH (a:`{from_label}` {{`{from_pk}`: map.from_id}})
-        MATCH (b:`{to_label}` {{`{to_pk}`: map.to_id}})
-        MERGE (a)-[r:`{rel_type}`]->(b)
-        SET r = map.props
+                def to_records(rows):
+                    keys = rows_to_columns(rows, [(from_fk_col, "from"), (to_fk_col, "to")])
+                    return [
+                        (str(from_id), str(to_id), props)
+                        for from_id, to_id, props in zip(keys["from"], keys["to"], rows_to_props(rows, rel_prop_items))
+                        if from_id is not None and to_id is not None
+                    ]
+                prop_types = self._export_csv(
+                    open_cursor, f"SELECT * FROM {quote_identifier(link_table_name)}", data_file, to_records)
+                prop_names = [prop for _, prop in rel_prop_items]
+            else:
+                continue
+
+            print(f"已导出关系 '{rel_type}'。")
+            header = ends + [f"{prop}:{prop_types.get(prop, 'string')}" for prop in prop_names]
+            header_file = self._write_csv_header(bulk_dir, file_stem, header)
+            import_args.append(f"--relationships={rel_type}={header_file},{data_file}")
+
+        return import_args
+
+    def _export_csv(self, open_cursor, query, data_file, to_records):
         """
+        执行查询并将结果逐批写入 CSV（不含表头）。
+        to_records 把一批结果行转换为记录元组，元组最后一项为属性字典。
+        返回 属性名 -> neo4j-admin 类型，按每个属性的首个非空值推断。
+        """
+        prop_types = {}
+        cursor = open_cursor()
         try:
-            self.neo4j_graph.run(query, data=data_list)
-        except Exception as e:
-            print(f"批量创建关系 {rel_type} 失败: {e}")
+            cursor.execute(query)
+            with open(data_file, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    for *ids, props in to_records(rows):
+                        for prop, value in props.items():
+                            if value is not None and prop not in prop_types:
+                                prop_types[prop] = neo4j_csv_type(value)
+                        writer.writerow(ids + list(props.values()))
+        finally:
+            cursor.close()
+        return prop_types
+
+    def _write_csv_header(self, bulk_dir, name, header):
+        header_file = os.path.join(bulk_dir, f"{name}_header.csv")
+        with open(header_file, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(header)
+        return header_file
 
 
 if __name__ == "__main__":
-    # 在全局范围内声明 schema_data，以便在导入阶段可以访问
-    global schema_data 
+    parser = argparse.ArgumentParser(description="将关系型数据库导入 Neo4j。")
+    parser.add_argument("--bulk", action="store_true",
+                        help="目标数据库为空时，使用 neo4j-admin 离线批量导入 CSV 代替 MERGE 导入")
+    args = parser.parse_args()
 
     print("步骤 1 & 2: 正在从数据库抽取元数据并生成初始配置文件 'config.json'...")
     schema_data = extract_relational_schema()
@@ -450,5 +1014,11 @@ if __name__ == "__main__":
         # 步骤 3 & 4
         neo4j_importer = Neo4jImporter()
         if neo4j_importer.connect():
-            neo4j_importer.import_data()
+            try:
+                if args.bulk:
+                    neo4j_importer.import_bulk_via_csv(schema=schema_data)
+                else:
+                    neo4j_importer.import_data(schema=schema_data)
+            finally:
+                neo4j_importer.close()
 